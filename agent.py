@@ -1,9 +1,20 @@
 import os
 import json
+import time
+import asyncio
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from typing import List, Dict, Any, Optional, TypedDict
 from dotenv import load_dotenv
 from langgraph.graph import StateGraph, END
 import requests
+import orjson
+from requests.adapters import HTTPAdapter
+import httpx
+import numpy as np
+import faiss
 from document_processor import DocumentProcessor
 from vector_store import VectorStore
 
@@ -15,9 +26,103 @@ if not GROQ_API_KEY:
 
 # Direct Groq API configuration
 GROQ_API_URL = "https://api.groq.com/openai/v1/chat/completions"
+GROQ_MODEL = "llama-3.3-70b-versatile"
 
-def simple_groq_call(prompt, model="llama-3.3-70b-versatile"):
-    """Make a simple call to Groq API"""
+# Vector store configuration
+VECTOR_STORE_TYPE = "chroma"
+VECTOR_STORE_DIR = "./rag_vector_db"
+
+# Retrieval defaults
+DEFAULT_K = 5
+
+@lru_cache(maxsize=1)
+def get_document_processor():
+    """Return the shared document processor"""
+    return DocumentProcessor()
+
+@lru_cache(maxsize=1)
+def get_vector_store(store_type=VECTOR_STORE_TYPE, persist_directory=VECTOR_STORE_DIR):
+    """Return the shared vector store, so the embedding model loads once per process"""
+    return VectorStore(store_type=store_type, persist_directory=persist_directory)
+
+class _QueryCache:
+    """Semantic cache of retrieval results keyed by query embedding similarity"""
+    
+    def __init__(self, threshold=0.95, max_entries=256, ttl=300):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl = ttl
+        # One index per retrieval params, so results for other settings never crowd out a hit
+        self.indexes = {}
+        self.entries = OrderedDict()  # id -> (timestamp, params, result)
+        self.next_id = 0
+        # Streamlit runs each session on its own thread
+        self._lock = threading.Lock()
+    
+    def _prepare(self, embedding):
+        vector = np.asarray([embedding], dtype="float32")
+        # Normalize so inner product equals cosine similarity
+        faiss.normalize_L2(vector)
+        return vector
+    
+    def _remove(self, entry_id):
+        _, params, _ = self.entries.pop(entry_id)
+        index = self.indexes[params]
+        index.remove_ids(np.asarray([entry_id], dtype="int64"))
+        if index.ntotal == 0:
+            del self.indexes[params]
+    
+    def get(self, embedding, params=None):
+        """Return the cached result for a similar enough query with the same params, or None"""
+        with self._lock:
+            index = self.indexes.get(params)
+            if index is None:
+                return None
+            
+            scores, ids = index.search(self._prepare(embedding), 1)
+            entry_id = int(ids[0][0])
+            if entry_id < 0 or scores[0][0] < self.threshold:
+                return None
+            
+            timestamp, _, result = self.entries[entry_id]
+            if time.time() - timestamp > self.ttl:
+                self._remove(entry_id)
+                return None
+            
+            self.entries.move_to_end(entry_id)
+            return result
+    
+    def put(self, embedding, result, params=None):
+        """Cache a result, evicting the least recently used entry when full"""
+        vector = self._prepare(embedding)
+        with self._lock:
+            while len(self.entries) >= self.max_entries:
+                self._remove(next(iter(self.entries)))
+            
+            index = self.indexes.get(params)
+            if index is None:
+                index = self.indexes[params] = faiss.IndexIDMap(faiss.IndexFlatIP(vector.shape[1]))
+            
+            index.add_with_ids(vector, np.asarray([self.next_id], dtype="int64"))
+            self.entries[self.next_id] = (time.time(), params, result)
+            self.next_id += 1
+    
+    def clear(self):
+        """Drop all cached results (the underlying documents changed)"""
+        with self._lock:
+            self.indexes.clear()
+            self.entries.clear()
+
+_query_cache = _QueryCache()
+
+# Pooled HTTP session so Groq calls reuse TLS connections
+_SESSION = requests.Session()
+_SESSION.mount("https://", HTTPAdapter(pool_connections=10, pool_maxsize=100))
+
+GROQ_ASYNC_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=20)
+
+def _groq_request(prompt, model):
+    """Build the headers and payload for a Groq chat completion"""
     headers = {
         "Authorization": f"Bearer {GROQ_API_KEY}",
         "Content-Type": "application/json"
@@ -32,35 +137,79 @@ def simple_groq_call(prompt, model="llama-3.3-70b-versatile"):
         "max_tokens": 2000
     }
     
-    try:
-        response = requests.post(GROQ_API_URL, headers=headers, json=data, timeout=30)
+    return headers, data
+
+def _parse_groq_response(response):
+    """Turn a Groq response into (content, error)"""
+    if response.status_code == 200:
+        result = orjson.loads(response.content)
+        content = result["choices"][0]["message"]["content"]
+        return content, None
+    else:
+        try:
+            error_detail = response.json()
+            error_msg = f"API Error {response.status_code}: {json.dumps(error_detail, indent=2)}"
+        except:
+            error_msg = f"API Error {response.status_code}: {response.text}"
         
-        if response.status_code == 200:
-            result = response.json()
-            content = result["choices"][0]["message"]["content"]
-            return content, None
-        else:
-            try:
-                error_detail = response.json()
-                error_msg = f"API Error {response.status_code}: {json.dumps(error_detail, indent=2)}"
-            except:
-                error_msg = f"API Error {response.status_code}: {response.text}"
-            
-            return None, error_msg
+        return None, error_msg
+
+def simple_groq_call(prompt, model=GROQ_MODEL):
+    """Make a simple call to Groq API"""
+    headers, data = _groq_request(prompt, model)
+    
+    try:
+        response = _SESSION.post(GROQ_API_URL, headers=headers, data=orjson.dumps(data), timeout=30)
+        return _parse_groq_response(response)
     except Exception as e:
         return None, f"Error: {str(e)}"
 
-# Test the connection
-test_response, test_error = simple_groq_call("What is 2+2? Answer with just the number.")
+async def simple_groq_call_async(prompt, client, model=GROQ_MODEL):
+    """Make a call to Groq API on a shared httpx client without blocking the event loop"""
+    headers, data = _groq_request(prompt, model)
+    
+    try:
+        response = await client.post(GROQ_API_URL, headers=headers, content=orjson.dumps(data), timeout=30)
+        return _parse_groq_response(response)
+    except Exception as e:
+        return None, f"Error: {str(e)}"
 
-if test_error:
-    GROQ_IS_WORKING = False
-    GROQ_ERROR_MSG = test_error
-    GROQ_MODEL = None
-else:
-    GROQ_IS_WORKING = True
-    GROQ_ERROR_MSG = None
-    GROQ_MODEL = "llama-3.3-70b-versatile"
+def _parse_stream_line(line):
+    """Extract the text delta from one server-sent event line, or None"""
+    if not line or not line.startswith("data: "):
+        return None
+    
+    payload = line[len("data: "):]
+    if payload == "[DONE]":
+        return None
+    
+    chunk = orjson.loads(payload)
+    return chunk["choices"][0]["delta"].get("content")
+
+def stream_groq_call(prompt, model=GROQ_MODEL):
+    """Stream a Groq completion, yielding text as it arrives (raises on API errors)"""
+    headers, data = _groq_request(prompt, model)
+    data["stream"] = True
+    
+    with _SESSION.post(GROQ_API_URL, headers=headers, data=orjson.dumps(data), timeout=30, stream=True) as response:
+        if response.status_code != 200:
+            _, error = _parse_groq_response(response)
+            raise RuntimeError(error)
+        
+        # Decode as UTF-8 ourselves; requests falls back to ISO-8859-1 for text/event-stream
+        for line in response.iter_lines():
+            content = _parse_stream_line(line.decode("utf-8"))
+            if content:
+                yield content
+
+@lru_cache(maxsize=1)
+def get_groq_status():
+    """Test the Groq connection once per process, returning (is_working, error)"""
+    test_response, test_error = simple_groq_call("What is 2+2? Answer with just the number.")
+    
+    if test_error:
+        return False, test_error
+    return True, None
 
 # Define state structure
 class RAGState(TypedDict):
@@ -71,6 +220,8 @@ class RAGState(TypedDict):
     response: Optional[str]
     error: Optional[str]
     model_used: Optional[str]
+    k: Optional[int]
+    ef_search: Optional[int]
 
 def ingest_documents(state: RAGState):
     """Ingest documents into the vector store"""
@@ -79,20 +230,24 @@ def ingest_documents(state: RAGState):
         return state
     
     try:
-        # Initialize document processor and vector store
-        processor = DocumentProcessor()
-        vector_store = VectorStore(store_type="chroma", persist_directory="./rag_vector_db")
+        # Get document processor and vector store
+        processor = get_document_processor()
+        vector_store = get_vector_store()
         
-        # Process documents
-        chunks = processor.process_documents(state["documents"])
+        # Stream chunks straight into the vector store in embedding batches
+        chunks = processor.iter_chunks(state["documents"])
+        chunk_count = vector_store.add_documents_stream(chunks)
         
-        # Add to vector store
-        success = vector_store.add_documents(chunks)
+        # Cached retrievals no longer reflect the store (even after a partial failure)
+        _query_cache.clear()
         
-        if success:
-            state["response"] = f"Successfully ingested {len(chunks)} document chunks from {len(state['documents'])} documents"
-        else:
+        # Only chunks that were not already stored count as ingested
+        if chunk_count is None:
             state["error"] = "Failed to ingest documents"
+        elif chunk_count == 0:
+            state["error"] = "No new document chunks to ingest (the files are empty or already stored)"
+        else:
+            state["response"] = f"Successfully ingested {chunk_count} document chunks from {len(state['documents'])} documents"
         
         return state
     except Exception as e:
@@ -106,11 +261,29 @@ def retrieve_documents(state: RAGState):
         return state
     
     try:
-        # Initialize vector store
-        vector_store = VectorStore(store_type="chroma", persist_directory="./rag_vector_db")
+        # Get vector store
+        vector_store = get_vector_store()
+        k = state.get("k") or DEFAULT_K
+        # None keeps the search breadth the store was created with
+        ef_search = state.get("ef_search")
+        if ef_search is not None and not vector_store.supports_query_ef_search:
+            print(f"ef_search is not supported by the {vector_store.store_type} store; using its default")
+            ef_search = None
+        elif ef_search == vector_store.ef_search:
+            # Same results as the default, so share its cache entries
+            ef_search = None
+        
+        # Reuse results from a near-identical recent query with the same settings
+        query_embedding = vector_store.embeddings.embed_query(state["query"])
+        cached = _query_cache.get(query_embedding, (k, ef_search))
+        if cached is not None:
+            state["retrieved_docs"], state["context"] = cached
+            return state
         
         # Retrieve documents
-        docs_with_scores = vector_store.similarity_search_with_score(state["query"], k=5)
+        docs_with_scores = vector_store.similarity_search_with_score(
+            state["query"], k=k, ef_search=ef_search
+        )
         
         # Format retrieved documents
         retrieved_docs = []
@@ -128,45 +301,58 @@ def retrieve_documents(state: RAGState):
         state["retrieved_docs"] = retrieved_docs
         state["context"] = "\n\n".join(context_parts)
         
+        if retrieved_docs:
+            _query_cache.put(query_embedding, (retrieved_docs, state["context"]), (k, ef_search))
+        
         return state
     except Exception as e:
         state["error"] = f"Error during document retrieval: {str(e)}"
         return state
 
-def generate_response(state: RAGState):
-    """Generate response using retrieved context"""
-    # Check for errors from previous steps
-    if state.get("error"):
-        state["response"] = state["error"]
-        return state
-    
-    # Check if context is available
-    if not state.get("context"):
-        state["error"] = "No context available for response generation"
-        return state
-    
-    # Check if Groq is working
-    if not GROQ_IS_WORKING:
-        state["error"] = "Groq API connection failed"
-        return state
-    
-    # Create RAG prompt
-    prompt = f"""
+_PROMPT_TEMPLATE = """
     You are a helpful assistant that answers questions based on the provided context.
     
     CONTEXT:
-    {state["context"]}
+    {context}
     
     QUESTION:
-    {state["query"]}
+    {query}
     
     Based on the context provided, answer the question. If the context doesn't contain enough information to answer the question, say "I don't have enough information to answer this question based on the provided documents."
     
     Provide a comprehensive answer with citations to the sources when possible.
     """
+
+# Split the fixed boilerplate once at import so each query only joins strings
+_PROMPT_PREFIX, _, _prompt_rest = _PROMPT_TEMPLATE.partition("{context}")
+_PROMPT_MID, _, _PROMPT_SUFFIX = _prompt_rest.partition("{query}")
+
+def build_rag_prompt(context, query):
+    """Create the RAG prompt for a question and its retrieved context"""
+    return "".join((_PROMPT_PREFIX, context, _PROMPT_MID, query, _PROMPT_SUFFIX))
+
+def _prepare_generation(state: RAGState):
+    """Validate the state before generation, returning the prompt or None on error"""
+    # Check for errors from previous steps
+    if state.get("error"):
+        state["response"] = state["error"]
+        return None
     
-    response, error = simple_groq_call(prompt, GROQ_MODEL)
+    # Check if context is available
+    if not state.get("context"):
+        state["error"] = "No context available for response generation"
+        return None
     
+    # Check if Groq is working
+    groq_is_working, _ = get_groq_status()
+    if not groq_is_working:
+        state["error"] = "Groq API connection failed"
+        return None
+    
+    return build_rag_prompt(state["context"], state["query"])
+
+def _apply_generation(state: RAGState, response, error):
+    """Store the Groq result in the state"""
     if error:
         state["error"] = f"Error generating response: {error}"
         return state
@@ -176,6 +362,24 @@ def generate_response(state: RAGState):
     
     return state
 
+def generate_response(state: RAGState):
+    """Generate response using retrieved context"""
+    prompt = _prepare_generation(state)
+    if prompt is None:
+        return state
+    
+    response, error = simple_groq_call(prompt, GROQ_MODEL)
+    return _apply_generation(state, response, error)
+
+async def generate_response_async(state: RAGState, client):
+    """Generate response using retrieved context without blocking the event loop"""
+    prompt = _prepare_generation(state)
+    if prompt is None:
+        return state
+    
+    response, error = await simple_groq_call_async(prompt, client, GROQ_MODEL)
+    return _apply_generation(state, response, error)
+
 # Build the RAG workflow
 rag_workflow = StateGraph(RAGState)
 
@@ -215,22 +419,25 @@ def ingest_documents_from_files(file_paths):
     }
     
     result = ingest_graph.invoke(initial_state)
-    return result.get("response", result.get("error", "No response generated"))
+    # The state always has a "response" key, so fall back on its value rather than its presence
+    return result.get("response") or result.get("error") or "No response generated"
 
-def query_rag(query):
-    """Query the RAG system"""
-    initial_state = {
+def _query_state(query, k=DEFAULT_K, ef_search=None):
+    """Initial RAG state for a query"""
+    return {
         "documents": None,
         "query": query,
         "retrieved_docs": None,
         "context": None,
         "response": None,
         "error": None,
-        "model_used": None
+        "model_used": None,
+        "k": k,
+        "ef_search": ef_search
     }
-    
-    result = rag_graph.invoke(initial_state)
-    
+
+def _query_result(result):
+    """Format a finished RAG state for callers"""
     return {
         "response": result.get("response", result.get("error", "No response generated")),
         "retrieved_docs": result.get("retrieved_docs", []),
@@ -238,15 +445,70 @@ def query_rag(query):
         "error": result.get("error")
     }
 
+async def _query_one_async(query, k, ef_search, client):
+    """Retrieve in a worker thread, then generate over the shared client"""
+    state = await asyncio.to_thread(retrieve_documents, _query_state(query, k, ef_search))
+    result = await generate_response_async(state, client)
+    return _query_result(result)
+
+async def _query_many_async(queries, k, ef_search):
+    """Answer several queries concurrently over one connection pool"""
+    # Probe Groq once up front instead of inside every concurrent generation
+    await asyncio.to_thread(get_groq_status)
+    
+    async with httpx.AsyncClient(limits=GROQ_ASYNC_LIMITS) as client:
+        return await asyncio.gather(
+            *(_query_one_async(query, k, ef_search, client) for query in queries)
+        )
+
+def _run_async(coroutine):
+    """Run a coroutine to completion, even when called from inside a running event loop"""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coroutine)
+    
+    # asyncio.run can't nest, so give the coroutine its own loop on a worker thread
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(asyncio.run, coroutine).result()
+
+def query_rag(query, k=DEFAULT_K, ef_search=None):
+    """Query the RAG system; a list of queries is answered concurrently and returns a list of results"""
+    if isinstance(query, (list, tuple)):
+        return list(_run_async(_query_many_async(query, k, ef_search)))
+    
+    # Call the two nodes directly; graph dispatch adds nothing for a linear retrieve -> generate
+    state = retrieve_documents(_query_state(query, k, ef_search))
+    result = generate_response(state)
+    return _query_result(result)
+
+def query_rag_stream(query, k=DEFAULT_K, ef_search=None):
+    """Query the RAG system, returning the answer as a generator of text chunks"""
+    state = retrieve_documents(_query_state(query, k, ef_search))
+    prompt = _prepare_generation(state)
+    result = _query_result(state)
+    
+    if prompt is not None:
+        result["response"] = stream_groq_call(prompt, GROQ_MODEL)
+        result["model_used"] = GROQ_MODEL
+    
+    return result
+
+def get_default_ef_search():
+    """Return the store's default ef_search, or None if it can't be changed per query"""
+    vector_store = get_vector_store()
+    if not vector_store.supports_query_ef_search:
+        return None
+    return vector_store.ef_search
+
 def get_vector_store_info():
     """Get information about the vector store"""
-    vector_store = VectorStore(store_type="chroma", persist_directory="./rag_vector_db")
-    return vector_store.get_collection_info()
+    return get_vector_store().get_collection_info()
 
 def clear_vector_store():
     """Clear the vector store"""
-    vector_store = VectorStore(store_type="chroma", persist_directory="./rag_vector_db")
-    return vector_store.delete_collection()
+    _query_cache.clear()
+    return get_vector_store().delete_collection()
 
 # For testing
 if __name__ == "__main__":
@@ -3,13 +3,24 @@ import os
 import tempfile
 from agent import (
     ingest_documents_from_files, 
-    query_rag, 
+    query_rag_stream, 
     get_vector_store_info, 
     clear_vector_store,
-    GROQ_IS_WORKING,
-    GROQ_MODEL
+    get_groq_status,
+    get_default_ef_search,
+    GROQ_MODEL,
+    DEFAULT_K
 )
-from document_processor import DocumentProcessor
+
+@st.cache_resource
+def cached_groq_status():
+    """Probe the Groq API once per server process instead of on every rerun"""
+    return get_groq_status()
+
+@st.cache_data(ttl=60)
+def cached_vector_store_info():
+    """Vector store info for the sidebar, refreshed at most once a minute"""
+    return get_vector_store_info()
 
 st.set_page_config(
     page_title="LangGraph-Groq RAG System",
@@ -24,19 +35,35 @@ st.markdown("Upload documents and ask questions about them using AI-powered retr
 st.sidebar.header("⚙️ Configuration")
 
 # Show Groq status
+GROQ_IS_WORKING, GROQ_ERROR_MSG = cached_groq_status()
 if GROQ_IS_WORKING:
     st.sidebar.success(f"✅ Groq API is working! Using model: {GROQ_MODEL}")
 else:
     st.sidebar.error("❌ Groq API connection failed!")
 
 # Vector store info
-vector_store_info = get_vector_store_info()
+vector_store_info = cached_vector_store_info()
 st.sidebar.subheader("📊 Vector Store Info")
 st.sidebar.json(vector_store_info)
 
+# Retrieval settings
+st.sidebar.subheader("🔧 Retrieval Settings")
+retrieval_k = st.sidebar.slider(
+    "Chunks to retrieve (k)", min_value=1, max_value=20, value=DEFAULT_K,
+    help="Fewer chunks suit short factual questions; more suit summaries"
+)
+default_ef_search = get_default_ef_search()
+ef_search = None
+if default_ef_search is not None:
+    ef_search = st.sidebar.slider(
+        "HNSW search breadth (ef_search)", min_value=10, max_value=500, value=default_ef_search, step=10,
+        help="Higher values improve recall at the cost of query speed"
+    )
+
 # Clear vector store button
 if st.sidebar.button("🗑️ Clear Vector Store"):
     if clear_vector_store():
+        cached_vector_store_info.clear()
         st.sidebar.success("Vector store cleared successfully!")
         st.rerun()
     else:
@@ -82,6 +109,7 @@ with tab1:
                     st.error(f"Error: {result}")
                 else:
                     st.success(result)
+                    cached_vector_store_info.clear()
                     st.rerun()
     
     # Manual text input
@@ -111,6 +139,7 @@ with tab1:
                     st.error(f"Error: {result}")
                 else:
                     st.success(result)
+                    cached_vector_store_info.clear()
                     st.rerun()
 
 with tab2:
@@ -123,27 +152,30 @@ with tab2:
         if not GROQ_IS_WORKING:
             st.error("Cannot answer questions - Groq API is not connected.")
         else:
-            with st.spinner("Searching documents and generating answer..."):
-                result = query_rag(query)
+            with st.spinner("Searching documents..."):
+                result = query_rag_stream(query, k=retrieval_k, ef_search=ef_search)
+            
+            if result.get("error"):
+                st.error(f"Error: {result['error']}")
+            else:
+                # Display answer as it streams in
+                st.subheader("💡 Answer")
+                try:
+                    st.write_stream(result["response"])
+                except Exception as e:
+                    st.error(f"Error generating response: {str(e)}")
                 
-                if result.get("error"):
-                    st.error(f"Error: {result['error']}")
-                else:
-                    # Display answer
-                    st.subheader("💡 Answer")
-                    st.write(result["response"])
-                    
-                    # Display model used
-                    st.caption(f"Generated using: {result.get('model_used', 'Unknown model')}")
-                    
-                    # Display retrieved documents
-                    if result.get("retrieved_docs"):
-                        with st.expander("📚 Retrieved Documents"):
-                            for i, doc in enumerate(result["retrieved_docs"]):
-                                st.markdown(f"**Document {i+1}** (Relevance: {doc['relevance_score']:.4f})")
-                                st.write(doc["content"])
-                                st.caption(f"Source: {doc['metadata'].get('source', 'Unknown')}")
-                                st.divider()
+                # Display model used
+                st.caption(f"Generated using: {result.get('model_used', 'Unknown model')}")
+                
+                # Display retrieved documents
+                if result.get("retrieved_docs"):
+                    with st.expander("📚 Retrieved Documents"):
+                        for i, doc in enumerate(result["retrieved_docs"]):
+                            st.markdown(f"**Document {i+1}** (Relevance: {doc['relevance_score']:.4f})")
+                            st.write(doc["content"])
+                            st.caption(f"Source: {doc['metadata'].get('source', 'Unknown')}")
+                            st.divider()
 
 # Footer
 st.markdown("---")
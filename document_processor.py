@@ -1,15 +1,41 @@
 import os
-import uuid
-from typing import List, Dict, Any, Optional
+import mmap
+import codecs
+import hashlib
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Any, Optional, Iterable, Iterator
 import pypdf
 import docx
+import xxhash
+from datasketch import MinHash, MinHashLSH
+try:
+    import pymupdf as fitz
+except ImportError:
+    # PyMuPDF releases before 1.24.3 only provide the fitz name
+    try:
+        import fitz
+    except ImportError:
+        fitz = None
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_core.documents import Document
 
+# TXT files are streamed in windows of this many chunks
+TXT_WINDOW_CHUNKS = 64
+
+# Near-duplicate detection settings
+SHINGLE_SIZE = 5
+MINHASH_PERMUTATIONS = 64
+
 class DocumentProcessor:
     """Process various document formats and prepare them for vector storage"""
     
-    def __init__(self, chunk_size=1000, chunk_overlap=200):
+    def __init__(self, chunk_size=1000, chunk_overlap=200, n_workers=None, dedup_threshold=0.9):
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.n_workers = n_workers or os.cpu_count() or 1
+        # Jaccard similarity above which chunks count as near-duplicates (None disables)
+        self.dedup_threshold = dedup_threshold
         self.text_splitter = RecursiveCharacterTextSplitter(
             chunk_size=chunk_size,
             chunk_overlap=chunk_overlap
@@ -19,20 +45,25 @@ class DocumentProcessor:
         """Extract text from PDF file"""
         documents = []
         try:
-            with open(file_path, 'rb') as file:
-                pdf_reader = pypdf.PdfReader(file)
-                text = ""
-                for page in pdf_reader.pages:
-                    text += page.extract_text() + "\n"
-                
-                # Create metadata
-                metadata = {
-                    "source": file_path,
-                    "file_type": "pdf",
-                    "page_count": len(pdf_reader.pages)
-                }
-                
-                documents.append(Document(page_content=text, metadata=metadata))
+            if fitz is not None:
+                with fitz.open(file_path) as doc:
+                    parts = [page.get_text() for page in doc]
+            else:
+                with open(file_path, 'rb') as file:
+                    pdf_reader = pypdf.PdfReader(file)
+                    parts = [page.extract_text() for page in pdf_reader.pages]
+            
+            # Join once instead of repeated concatenation
+            text = "\n".join(parts)
+            
+            # Create metadata
+            metadata = {
+                "source": file_path,
+                "file_type": "pdf",
+                "page_count": len(parts)
+            }
+            
+            documents.append(Document(page_content=text, metadata=metadata))
         except Exception as e:
             print(f"Error processing PDF {file_path}: {str(e)}")
         
@@ -78,34 +109,130 @@ class DocumentProcessor:
         
         return documents
     
-    def process_documents(self, file_paths: List[str]) -> List[Document]:
-        """Process multiple documents and split into chunks"""
-        all_documents = []
+    def stream_txt_chunks(self, file_path: str) -> Iterator[Document]:
+        """Split a TXT file into chunks without reading the whole file into memory (raises on read errors)"""
+        metadata = {
+            "source": file_path,
+            "file_type": "txt"
+        }
+        window = (self.chunk_size + self.chunk_overlap) * TXT_WINDOW_CHUNKS
+        
+        try:
+            with open(file_path, 'rb') as file:
+                size = os.fstat(file.fileno()).st_size
+                if size == 0:
+                    return
+                
+                with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    decoder = codecs.getincrementaldecoder('utf-8')()
+                    buffer = ""
+                    pending_cr = ""
+                    
+                    for start in range(0, size, window):
+                        final = start + window >= size
+                        text = pending_cr + decoder.decode(mapped[start:start + window], final=final)
+                        
+                        # Universal newlines, as open(..., 'r') gives load_txt; a trailing \r may start a \r\n
+                        pending_cr = ""
+                        if not final and text.endswith("\r"):
+                            text, pending_cr = text[:-1], "\r"
+                        buffer += text.replace("\r\n", "\n").replace("\r", "\n")
+                        pieces = self.text_splitter.split_text(buffer)
+                        
+                        if not final:
+                            # The last piece may continue in the next window, so carry it over
+                            if len(pieces) < 2:
+                                continue
+                            buffer = buffer[buffer.rfind(pieces[-1]):]
+                            pieces = pieces[:-1]
+                        
+                        for piece in pieces:
+                            yield Document(page_content=piece, metadata=dict(metadata))
+        except Exception as e:
+            print(f"Error processing TXT {file_path}: {str(e)}")
+            # Chunks from earlier windows are already consumed, so the caller must see the failure
+            raise
+    
+    def load_document(self, file_path: str) -> List[Document]:
+        """Load a single document, dispatching on its file extension"""
+        file_ext = os.path.splitext(file_path)[1].lower()
+        
+        if file_ext == '.pdf':
+            return self.load_pdf(file_path)
+        elif file_ext == '.docx':
+            return self.load_docx(file_path)
+        elif file_ext == '.txt':
+            return self.load_txt(file_path)
+        
+        print(f"Unsupported file type: {file_ext}")
+        return []
+    
+    def deduplicate_chunks(self, chunks: List[Document]) -> List[Document]:
+        """Drop exact and near-duplicate chunks before they are embedded"""
+        return list(self._iter_unique_chunks(chunks))
+    
+    def _iter_unique_chunks(self, chunks: Iterable[Document]) -> Iterator[Document]:
+        """Yield chunks that are not exact or near duplicates of an earlier one"""
+        if self.dedup_threshold is None:
+            yield from chunks
+            return
+        
+        seen_hashes = set()
+        lsh = MinHashLSH(threshold=self.dedup_threshold, num_perm=MINHASH_PERMUTATIONS)
         
-        for file_path in file_paths:
-            file_ext = os.path.splitext(file_path)[1].lower()
+        for i, chunk in enumerate(chunks):
+            text = chunk.page_content
             
-            if file_ext == '.pdf':
-                documents = self.load_pdf(file_path)
-            elif file_ext == '.docx':
-                documents = self.load_docx(file_path)
-            elif file_ext == '.txt':
-                documents = self.load_txt(file_path)
-            else:
-                print(f"Unsupported file type: {file_ext}")
+            # Exact duplicates are caught by a plain hash without MinHash work
+            digest = hashlib.sha256(text.encode()).digest()
+            if digest in seen_hashes:
                 continue
+            seen_hashes.add(digest)
             
-            all_documents.extend(documents)
+            shingles = {text[j:j + SHINGLE_SIZE] for j in range(max(len(text) - SHINGLE_SIZE + 1, 1))}
+            minhash = MinHash(num_perm=MINHASH_PERMUTATIONS)
+            minhash.update_batch([shingle.encode() for shingle in shingles])
+            
+            if lsh.query(minhash):
+                continue
+            lsh.insert(str(i), minhash)
+            yield chunk
+    
+    def _finalize_chunks(self, chunks: Iterable[Document]) -> Iterator[Document]:
+        """Deduplicate chunks and tag them with IDs"""
+        # Content-addressed IDs so re-ingested text maps to the same ID
+        for i, chunk in enumerate(self._iter_unique_chunks(chunks)):
+            chunk.metadata["chunk_id"] = xxhash.xxh3_128_hexdigest(chunk.page_content.encode("utf-8"))
+            chunk.metadata["chunk_index"] = i
+            yield chunk
+    
+    def iter_chunks(self, file_paths: List[str]) -> Iterator[Document]:
+        """Yield chunks for multiple documents, streaming TXT files instead of loading them whole"""
+        txt_paths = [path for path in file_paths if os.path.splitext(path)[1].lower() == '.txt']
+        other_paths = [path for path in file_paths if path not in txt_paths]
+        all_documents = []
         
-        # Split documents into chunks
-        chunks = self.text_splitter.split_documents(all_documents)
+        # Load files in parallel; extraction is CPU-bound and holds the GIL
+        n_workers = min(self.n_workers, len(other_paths))
+        if n_workers > 1:
+            with ProcessPoolExecutor(max_workers=n_workers) as executor:
+                for documents in executor.map(_load_one, other_paths):
+                    all_documents.extend(documents)
+        else:
+            for file_path in other_paths:
+                all_documents.extend(self.load_document(file_path))
         
-        # Add unique IDs to chunks
-        for i, chunk in enumerate(chunks):
-            chunk.metadata["chunk_id"] = str(uuid.uuid4())
-            chunk.metadata["chunk_index"] = i
+        # Split documents into chunks
+        chunks = itertools.chain(
+            self.text_splitter.split_documents(all_documents),
+            *(self.stream_txt_chunks(path) for path in txt_paths)
+        )
         
-        return chunks
+        yield from self._finalize_chunks(chunks)
+    
+    def process_documents(self, file_paths: List[str]) -> List[Document]:
+        """Process multiple documents and split into chunks"""
+        return list(self.iter_chunks(file_paths))
     
     def create_document_from_text(self, text: str, source: str = "manual_input") -> List[Document]:
         """Create document chunks from raw text"""
@@ -117,9 +244,32 @@ class DocumentProcessor:
         document = Document(page_content=text, metadata=metadata)
         chunks = self.text_splitter.split_documents([document])
         
-        # Add unique IDs to chunks
-        for i, chunk in enumerate(chunks):
-            chunk.metadata["chunk_id"] = str(uuid.uuid4())
-            chunk.metadata["chunk_index"] = i
-        
-        return chunks
\ No newline at end of file
+        return list(self._finalize_chunks(chunks))
+
+
+def _load_one(file_path: str) -> List[Document]:
+    """Load a single document in a worker process (module-level so it pickles)"""
+    return DocumentProcessor(n_workers=1).load_document(file_path)
+
+
+# For testing
+if __name__ == "__main__":
+    import tempfile
+    
+    # Streamed TXT chunks must match splitting the whole file, for LF and CRLF line endings
+    TXT_WINDOW_CHUNKS = 1  # Small windows so the text crosses many window boundaries
+    processor = DocumentProcessor(chunk_size=200, chunk_overlap=40)
+    test_text = "".join(f"Paragraph {i} line one.\nLine two of {i}, caf\u00e9.\n\n" for i in range(300))
+    
+    with tempfile.TemporaryDirectory() as directory:
+        for name, newline in [("lf", "\n"), ("crlf", "\r\n")]:
+            file_path = os.path.join(directory, f"{name}.txt")
+            with open(file_path, 'w', encoding='utf-8', newline=newline) as file:
+                file.write(test_text)
+            
+            streamed = [chunk.page_content for chunk in processor.stream_txt_chunks(file_path)]
+            loaded = [chunk.page_content for chunk in processor.text_splitter.split_documents(processor.load_txt(file_path))]
+            assert streamed == loaded, f"{name}: streamed chunks differ from load_txt"
+            assert not any("\r" in chunk for chunk in streamed), f"{name}: carriage returns left in chunks"
+            
+            print(f"{name}: {len(streamed)} chunks match")
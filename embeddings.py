@@ -0,0 +1,210 @@
+import os
+import hashlib
+import pickle
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import List, Optional
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+
+class CachedEmbeddings(Embeddings):
+    """LRU cache around an embedding model, keyed by model name and text"""
+    
+    def __init__(self, inner: Embeddings, model_name: str, max_entries: int = 10000,
+                 cache_path: Optional[str] = None):
+        self.inner = inner
+        self.model_name = model_name
+        self.max_entries = max_entries
+        self.cache_path = cache_path
+        self._cache = OrderedDict()
+        self._dirty = False
+        # The shared VectorStore is used from every Streamlit session thread
+        self._lock = threading.Lock()
+        self._load()
+    
+    def _key(self, text: str) -> bytes:
+        """Hash the model name with the text so different models never collide"""
+        return hashlib.sha256(self.model_name.encode() + b"\0" + text.encode()).digest()
+    
+    def _get(self, key: bytes) -> Optional[List[float]]:
+        with self._lock:
+            vector = self._cache.get(key)
+            if vector is None:
+                return None
+            self._cache.move_to_end(key)
+        return vector.tolist()
+    
+    def _put(self, key: bytes, vector: List[float]):
+        # float32 arrays take a fraction of the memory of Python float lists
+        vector = np.asarray(vector, dtype=np.float32)
+        with self._lock:
+            self._cache[key] = vector
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+            self._dirty = True
+    
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed documents, only running the model on cache misses"""
+        keys = [self._key(text) for text in texts]
+        vectors = [self._get(key) for key in keys]
+        
+        # Embed all (deduplicated) misses in a single batch and scatter them back
+        misses = {}
+        for i, vector in enumerate(vectors):
+            if vector is None:
+                misses.setdefault(keys[i], []).append(i)
+        if misses:
+            miss_texts = [texts[indices[0]] for indices in misses.values()]
+            new_vectors = self.inner.embed_documents(miss_texts)
+            for (key, indices), vector in zip(misses.items(), new_vectors):
+                self._put(key, vector)
+                for i in indices:
+                    vectors[i] = vector
+        
+        return vectors
+    
+    def embed_query(self, text: str) -> List[float]:
+        """Embed a query, reusing a cached vector when available"""
+        key = self._key(text)
+        vector = self._get(key)
+        if vector is None:
+            vector = self.inner.embed_query(text)
+            self._put(key, vector)
+        return vector
+    
+    def _load(self):
+        """Load a previously saved cache for warm starts"""
+        if not self.cache_path or not os.path.exists(self.cache_path):
+            return
+        
+        try:
+            with open(self.cache_path, 'rb') as file:
+                cache = pickle.load(file)
+            if isinstance(cache, OrderedDict):
+                # Keep only the most recent entries if max_entries shrank
+                while len(cache) > self.max_entries:
+                    cache.popitem(last=False)
+                self._cache = OrderedDict(
+                    (key, np.asarray(vector, dtype=np.float32)) for key, vector in cache.items()
+                )
+        except Exception as e:
+            print(f"Error loading embedding cache: {str(e)}")
+    
+    def save(self):
+        """Persist the cache to disk if it changed"""
+        if not self.cache_path:
+            return
+        
+        # Snapshot under the lock so other threads can keep using the cache while it is written
+        with self._lock:
+            if not self._dirty:
+                return
+            snapshot = OrderedDict(self._cache)
+            self._dirty = False
+        
+        try:
+            os.makedirs(os.path.dirname(self.cache_path) or ".", exist_ok=True)
+            with open(self.cache_path, 'wb') as file:
+                pickle.dump(snapshot, file)
+        except Exception as e:
+            with self._lock:
+                self._dirty = True
+            print(f"Error saving embedding cache: {str(e)}")
+
+
+class OnnxEmbeddings(Embeddings):
+    """INT8-quantized ONNX Runtime version of a sentence-transformers model"""
+    
+    def __init__(self, model_name: str, batch_size: int = 64, cache_dir: str = "./onnx_models",
+                 max_length: int = 256):
+        # Optional dependency, only needed for precision="int8"
+        try:
+            from optimum.onnxruntime import ORTModelForFeatureExtraction, ORTQuantizer
+            from optimum.onnxruntime.configuration import AutoQuantizationConfig
+            from transformers import AutoTokenizer
+        except ImportError as e:
+            raise ImportError(
+                "INT8 embeddings require optimum: pip install optimum[onnxruntime]"
+            ) from e
+        
+        self.batch_size = batch_size
+        # sentence-transformers MiniLM truncates at 256 tokens, not the tokenizer's 512
+        self.max_length = max_length
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+        
+        # Export and quantize once, then reuse the quantized model from disk
+        quantized_dir = os.path.join(cache_dir, model_name.replace("/", "__") + "-int8")
+        if not os.path.exists(quantized_dir):
+            # Build in a temp directory so a failed export never looks finished
+            os.makedirs(cache_dir, exist_ok=True)
+            tmp_dir = tempfile.mkdtemp(dir=cache_dir)
+            try:
+                model = ORTModelForFeatureExtraction.from_pretrained(
+                    model_name,
+                    export=True,
+                    provider="CPUExecutionProvider"
+                )
+                quantizer = ORTQuantizer.from_pretrained(model)
+                quantizer.quantize(
+                    save_dir=tmp_dir,
+                    quantization_config=AutoQuantizationConfig.avx512_vnni(is_static=False)
+                )
+                os.replace(tmp_dir, quantized_dir)
+            finally:
+                shutil.rmtree(tmp_dir, ignore_errors=True)
+        
+        self.model = ORTModelForFeatureExtraction.from_pretrained(
+            quantized_dir,
+            file_name="model_quantized.onnx",
+            provider="CPUExecutionProvider"
+        )
+    
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        """Mean-pool and L2-normalize token embeddings, matching sentence-transformers"""
+        inputs = self.tokenizer(
+            texts,
+            padding=True,
+            truncation=True,
+            max_length=self.max_length,
+            return_tensors="np"
+        )
+        token_embeddings = self.model(**inputs).last_hidden_state
+        
+        mask = inputs["attention_mask"][..., None].astype(token_embeddings.dtype)
+        pooled = (token_embeddings * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        return pooled / np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+    
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed documents in batches"""
+        vectors = []
+        for start in range(0, len(texts), self.batch_size):
+            vectors.extend(self._encode(texts[start:start + self.batch_size]).tolist())
+        return vectors
+    
+    def embed_query(self, text: str) -> List[float]:
+        """Embed a single query"""
+        return self._encode([text])[0].tolist()
+
+
+class ProjectedEmbeddings(Embeddings):
+    """Embeddings projected onto a fitted PCA basis and re-normalized"""
+    
+    def __init__(self, inner: Embeddings, mean: np.ndarray, components: np.ndarray):
+        self.inner = inner
+        self.mean = mean
+        self.components = components
+    
+    def project(self, vectors) -> np.ndarray:
+        """Project full-width vectors, keeping them unit length so inner product stays cosine"""
+        projected = (np.asarray(vectors, dtype=np.float32) - self.mean) @ self.components.T
+        return projected / np.clip(np.linalg.norm(projected, axis=1, keepdims=True), 1e-12, None)
+    
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.project(self.inner.embed_documents(texts)).tolist()
+    
+    def embed_query(self, text: str) -> List[float]:
+        return self.project([self.inner.embed_query(text)])[0].tolist()
@@ -0,0 +1,87 @@
+import os
+import pickle
+from typing import List, Dict, Any, Optional, Tuple, Iterable
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+
+class USearchStore:
+    """Vector store on a USearch HNSW index, which ships SIMD (AVX2/AVX-512/NEON) cosine kernels"""
+    
+    def __init__(self, embedding_function: Embeddings, ndim: int, connectivity: int = 16,
+                 expansion_add: int = 64, expansion_search: int = 100):
+        # Optional dependency, only needed for store_type="usearch"
+        try:
+            from usearch.index import Index
+        except ImportError as e:
+            raise ImportError("The usearch store requires usearch: pip install usearch") from e
+        
+        self.embedding_function = embedding_function
+        self.config = {
+            "ndim": ndim,
+            "connectivity": connectivity,
+            "expansion_add": expansion_add,
+            "expansion_search": expansion_search
+        }
+        self.index = Index(metric="cos", dtype="f32", **self.config)
+        self.docstore: Dict[str, Document] = {}
+        self.index_to_docstore_id: Dict[int, str] = {}
+    
+    def add_embeddings(self, text_embeddings: Iterable[Tuple[str, List[float]]],
+                       metadatas: Optional[List[Dict[str, Any]]] = None,
+                       ids: Optional[List[str]] = None):
+        """Add precomputed embeddings with their texts"""
+        texts, vectors = zip(*text_embeddings)
+        metadatas = metadatas or [{} for _ in texts]
+        ids = ids or [str(len(self.docstore) + i) for i in range(len(texts))]
+        
+        # Contiguous float32 rows so USearch can copy them straight into its aligned storage
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        start = len(self.index_to_docstore_id)
+        keys = np.arange(start, start + len(texts), dtype=np.uint64)
+        self.index.add(keys, vectors)
+        
+        for key, text, metadata, doc_id in zip(keys, texts, metadatas, ids):
+            self.docstore[doc_id] = Document(page_content=text, metadata=metadata)
+            self.index_to_docstore_id[int(key)] = doc_id
+    
+    def similarity_search_with_score(self, query: str, k: int = 4) -> List[Tuple[Document, float]]:
+        """Search for similar documents, returning cosine distances (lower is closer)"""
+        if len(self.index) == 0:
+            return []
+        
+        vector = np.asarray(self.embedding_function.embed_query(query), dtype=np.float32)
+        matches = self.index.search(vector, k)
+        
+        return [
+            (self.docstore[self.index_to_docstore_id[int(key)]], float(distance))
+            for key, distance in zip(matches.keys, matches.distances)
+        ]
+    
+    def similarity_search(self, query: str, k: int = 4) -> List[Document]:
+        """Search for similar documents"""
+        return [doc for doc, _ in self.similarity_search_with_score(query, k=k)]
+    
+    def save_local(self, folder_path: str):
+        """Save the index and its documents"""
+        os.makedirs(folder_path, exist_ok=True)
+        self.index.save(os.path.join(folder_path, "index.usearch"))
+        with open(os.path.join(folder_path, "index.pkl"), 'wb') as file:
+            pickle.dump((self.config, self.docstore, self.index_to_docstore_id), file)
+    
+    @classmethod
+    def load_local(cls, folder_path: str, embeddings: Embeddings,
+                   expansion_search: Optional[int] = None) -> "USearchStore":
+        """Load a saved index; expansion_search overrides the saved search breadth"""
+        with open(os.path.join(folder_path, "index.pkl"), 'rb') as file:
+            config, docstore, index_to_docstore_id = pickle.load(file)
+        
+        if expansion_search is not None:
+            config["expansion_search"] = expansion_search
+        
+        store = cls(embeddings, **config)
+        store.index.load(os.path.join(folder_path, "index.usearch"))
+        store.docstore = docstore
+        store.index_to_docstore_id = index_to_docstore_id
+        return store
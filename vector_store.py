@@ -1,97 +1,486 @@
 import os
-from typing import List, Dict, Any, Optional, Tuple
+import gc
+import itertools
+import inspect
+import threading
+from functools import lru_cache
+from typing import List, Dict, Any, Optional, Tuple, Iterable
 # CORRECT IMPORTS:
 from langchain_core.documents import Document
 from langchain_community.embeddings import HuggingFaceEmbeddings
 from langchain_community.vectorstores import Chroma  # FIXED: Chroma is in community
 from langchain_community.vectorstores import FAISS
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_community.vectorstores.utils import DistanceStrategy
+import chromadb
+from chromadb.config import Settings
+from chromadb.api.models.Collection import Collection as ChromaCollection
+import faiss
+import xxhash
 import shutil
+import numpy as np
+from sklearn.decomposition import IncrementalPCA
+from embeddings import CachedEmbeddings, OnnxEmbeddings, ProjectedEmbeddings
+from usearch_store import USearchStore
+
+EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+EMBEDDING_BATCH_SIZE = 64
+# Chroma rejects oversized add() calls, so large ingests are split
+CHROMA_MAX_BATCH = 5000
+
+# Store types backed by a LangChain FAISS store
+FAISS_STORE_TYPES = ("faiss", "faiss_ivfpq")
+# IVF-PQ: inverted lists sized to the training set, 48 sub-quantizers of 8 bits (48 bytes per vector)
+IVFPQ_FACTORY = "IVF{nlist},PQ48x8"
+# FAISS k-means wants about 39 training points per centroid
+TRAIN_POINTS_PER_CENTROID = 39
+# Vectors needed before the IVF-PQ index is trained (>= 39 * 256 for the 8-bit PQ codebooks)
+PQ_TRAIN_SIZE = 10000
+# 8-bit PQ codebooks have 256 centroids, so FAISS refuses to train on fewer points
+PQ_MIN_TRAIN_SIZE = 256
+# Chunks needed before the PCA projection is fitted
+PCA_MIN_CHUNKS = 5000
+# LangChain's default Chroma collection
+CHROMA_COLLECTION = "langchain"
+# chromadb 1.x can change ef_search on an existing collection; older releases fix it at creation
+CHROMA_MODIFY_CONFIGURATION = "configuration" in inspect.signature(ChromaCollection.modify).parameters
+
+@lru_cache(maxsize=None)
+def load_embeddings(model_name: str = EMBEDDING_MODEL, precision: str = "fp32"):
+    """Load the embedding model at the requested precision (shared across stores)"""
+    if precision == "fp32":
+        return HuggingFaceEmbeddings(
+            model_name=model_name,
+            encode_kwargs={
+                "batch_size": EMBEDDING_BATCH_SIZE,
+                "normalize_embeddings": True
+            }
+        )
+    elif precision == "int8":
+        return OnnxEmbeddings(model_name, batch_size=EMBEDDING_BATCH_SIZE)
+    
+    raise ValueError(f"Unsupported embedding precision: {precision}")
 
 class VectorStore:
     """Handle vector database operations for RAG"""
     
-    def __init__(self, store_type="chroma", persist_directory="./vector_db"):
+    def __init__(self, store_type="chroma", persist_directory="./vector_db",
+                 m=24, ef_construction=128, ef_search=100, precision="fp32",
+                 faiss_index_type="hnsw", nprobe=16, pq_train_size=PQ_TRAIN_SIZE, dim_reduce=None):
         self.store_type = store_type
         self.persist_directory = persist_directory
-        self.embeddings = HuggingFaceEmbeddings(
-            model_name="sentence-transformers/all-MiniLM-L6-v2"
+        # HNSW graph parameters (tune for corpus size)
+        self.m = m
+        self.ef_construction = ef_construction
+        self.ef_search = ef_search
+        self.precision = precision
+        # "hnsw" for large corpora, "flat" for exact search on small ones
+        self.faiss_index_type = faiss_index_type
+        # Inverted lists scanned per query for store_type="faiss_ivfpq"
+        self.nprobe = nprobe
+        # Vectors staged before IVF-PQ training; below 39 * 256 FAISS warns the codebooks are undertrained
+        if pq_train_size < PQ_MIN_TRAIN_SIZE:
+            raise ValueError(f"pq_train_size must be at least {PQ_MIN_TRAIN_SIZE}")
+        self.pq_train_size = pq_train_size
+        # Target dimension for PCA reduction (None keeps full-width vectors)
+        if dim_reduce is not None and store_type == "faiss_ivfpq":
+            raise ValueError("dim_reduce is not supported with store_type='faiss_ivfpq'")
+        self.dim_reduce = dim_reduce
+        self.embedding_cache = CachedEmbeddings(
+            load_embeddings(EMBEDDING_MODEL, precision),
+            # Vectors from different precisions must not share cache entries
+            model_name=f"{EMBEDDING_MODEL}:{precision}:normalized",
+            cache_path=os.path.join(persist_directory, "emb_cache.pkl")
+        )
+        self.embeddings = self.embedding_cache
+        if dim_reduce is not None:
+            # Check now; IncrementalPCA would only fail after the chunks were already stored
+            dim = len(self.embedding_cache.embed_query("dimension probe"))
+            if not 0 < dim_reduce < dim:
+                raise ValueError(f"dim_reduce must be between 1 and {dim - 1} for {EMBEDDING_MODEL}")
+        self.projection = None
+        self._load_projection()
+        # The database is opened lazily on first access of self.db
+        self._db = None
+        self._db_loaded = False
+        # Chroma and USearch only have a store-wide search breadth, so searches that set it are serialized
+        self._search_lock = threading.Lock()
+        self._active_ef_search = None
+    
+    @property
+    def db(self):
+        if not self._db_loaded:
+            self._initialize_db()
+        return self._db
+    
+    @db.setter
+    def db(self, value):
+        self._db = value
+        self._db_loaded = True
+        # A new collection or index starts from its own configured breadth
+        self._active_ef_search = None
+    
+    @property
+    def supports_query_ef_search(self) -> bool:
+        """Whether similarity searches accept a per-query ef_search"""
+        if self.store_type == "chroma":
+            return CHROMA_MODIFY_CONFIGURATION
+        elif self.store_type == "faiss":
+            return self.faiss_index_type == "hnsw"
+        return self.store_type == "usearch"
+    
+    def _pca_path(self) -> str:
+        return os.path.join(self.persist_directory, "pca.npy")
+    
+    def _set_projection(self, projection: Optional[np.ndarray]):
+        """Use a PCA projection (mean row followed by component rows), or full-width vectors for None"""
+        self.projection = projection
+        if projection is None:
+            self.embeddings = self.embedding_cache
+        else:
+            self.embeddings = ProjectedEmbeddings(self.embedding_cache, projection[0], projection[1:])
+    
+    def _load_projection(self):
+        """Reuse a previously fitted projection from disk"""
+        if self.dim_reduce is not None and os.path.exists(self._pca_path()):
+            self._set_projection(np.load(self._pca_path()))
+    
+    def _store_name(self, base: str) -> str:
+        """Projected vectors live in their own collection or index since the dimension differs"""
+        if self.projection is None:
+            return base
+        return f"{base}_pca{self.projection.shape[0] - 1}"
+    
+    def _collection_name(self) -> str:
+        return self._store_name(CHROMA_COLLECTION)
+    
+    def _index_path(self) -> Optional[str]:
+        """On-disk location of a FAISS or USearch index (None for Chroma)"""
+        if self.store_type in FAISS_STORE_TYPES:
+            return os.path.join(self.persist_directory, self._store_name("faiss_index"))
+        elif self.store_type == "usearch":
+            return os.path.join(self.persist_directory, self._store_name("usearch_index"))
+        return None
+    
+    def _hnsw_metadata(self) -> Dict[str, Any]:
+        """Chroma collection metadata for the HNSW index"""
+        return {
+            "hnsw:space": "cosine",
+            "hnsw:M": self.m,
+            "hnsw:construction_ef": self.ef_construction,
+            "hnsw:search_ef": self.ef_search
+        }
+    
+    def _create_faiss_index(self) -> FAISS:
+        """Create an empty inner-product FAISS store (embeddings are normalized, so IP is cosine)"""
+        dim = len(self.embeddings.embed_query("dimension probe"))
+        if self.store_type == "faiss_ivfpq" or self.faiss_index_type == "flat":
+            # IVF-PQ stores stage vectors in a flat index until there are enough to train on
+            index = faiss.IndexFlatIP(dim)
+        elif self.faiss_index_type == "hnsw":
+            index = faiss.IndexHNSWFlat(dim, self.m, faiss.METRIC_INNER_PRODUCT)
+            index.hnsw.efConstruction = self.ef_construction
+            index.hnsw.efSearch = self.ef_search
+        else:
+            raise ValueError(f"Unsupported FAISS index type: {self.faiss_index_type}")
+        
+        return FAISS(
+            embedding_function=self.embeddings,
+            index=index,
+            docstore=InMemoryDocstore(),
+            index_to_docstore_id={},
+            distance_strategy=DistanceStrategy.MAX_INNER_PRODUCT
         )
-        self.db = None
-        self._initialize_db()
     
     def _initialize_db(self):
         """Initialize vector database"""
         if self.store_type == "chroma":
-            if os.path.exists(self.persist_directory):
-                self.db = Chroma(
-                    persist_directory=self.persist_directory,
-                    embedding_function=self.embeddings
-                )
-            else:
-                self.db = Chroma(
-                    embedding_function=self.embeddings,
-                    persist_directory=self.persist_directory
-                )
-        elif self.store_type == "faiss":
-            index_path = os.path.join(self.persist_directory, "faiss_index")
+            # Chroma opens the existing collection or creates it with the given metadata
+            client = chromadb.PersistentClient(
+                path=self.persist_directory,
+                settings=Settings(anonymized_telemetry=False)
+            )
+            self.db = Chroma(
+                client=client,
+                collection_name=self._collection_name(),
+                embedding_function=self.embeddings,
+                persist_directory=self.persist_directory,
+                collection_metadata=self._hnsw_metadata()
+            )
+        elif self.store_type in FAISS_STORE_TYPES:
+            index_path = self._index_path()
             if os.path.exists(index_path):
                 self.db = FAISS.load_local(
                     index_path, 
-                    self.embeddings
+                    self.embeddings,
+                    distance_strategy=DistanceStrategy.MAX_INNER_PRODUCT,
+                    # The docstore pickle was written by this class, not an untrusted source
+                    allow_dangerous_deserialization=True
                 )
+                # Search-time parameters are not persisted with the index
+                if hasattr(self.db.index, "hnsw"):
+                    self.db.index.hnsw.efSearch = self.ef_search
+                ivf = faiss.try_extract_index_ivf(self.db.index)
+                if ivf is not None:
+                    ivf.nprobe = self.nprobe
             else:
                 # Create empty FAISS index
                 self.db = None
+        elif self.store_type == "usearch":
+            index_path = self._index_path()
+            if os.path.exists(index_path):
+                self.db = USearchStore.load_local(
+                    index_path,
+                    self.embeddings,
+                    expansion_search=self.ef_search
+                )
+            else:
+                self.db = None
     
-    def add_documents(self, documents: List[Document]) -> bool:
-        """Add documents to the vector store"""
+    def _filter_new_documents(self, documents: List[Document]) -> Tuple[List[str], List[Document]]:
+        """Drop documents whose chunk ID is duplicated in the batch or already stored"""
+        unique = {}
+        for doc in documents:
+            chunk_id = doc.metadata.get("chunk_id") or xxhash.xxh3_128_hexdigest(doc.page_content.encode("utf-8"))
+            unique.setdefault(chunk_id, doc)
+        
+        existing = set()
+        if self.store_type == "chroma" and self.db is not None:
+            ids = list(unique)
+            for start in range(0, len(ids), CHROMA_MAX_BATCH):
+                found = self.db._collection.get(ids=ids[start:start + CHROMA_MAX_BATCH], include=[])
+                existing.update(found["ids"])
+        elif self.store_type in FAISS_STORE_TYPES + ("usearch",) and self.db is not None:
+            existing = set(self.db.index_to_docstore_id.values())
+        
+        new_ids = [chunk_id for chunk_id in unique if chunk_id not in existing]
+        return new_ids, [unique[chunk_id] for chunk_id in new_ids]
+    
+    def _add_batch(self, documents: List[Document]) -> int:
+        """Embed and insert a batch of documents without persisting, returning how many were new"""
+        if self.store_type == "chroma" and self.db is None:
+            self._initialize_db()
+        
+        # Skip chunks that are already stored before paying for embeddings
+        ids, documents = self._filter_new_documents(documents)
+        if not documents:
+            return 0
+        
+        # Embed every chunk in one batched call instead of per document
+        texts = [doc.page_content for doc in documents]
+        metadatas = [doc.metadata for doc in documents]
+        vectors = self.embeddings.embed_documents(texts)
+        
+        self._insert(ids, texts, metadatas, vectors)
+        return len(documents)
+    
+    def _insert(self, ids: List[str], texts: List[str], metadatas: List[Dict[str, Any]],
+                vectors: List[List[float]]):
+        """Insert precomputed vectors into the store"""
+        if self.store_type == "chroma":
+            # Write the precomputed vectors directly so Chroma doesn't re-embed
+            for start in range(0, len(texts), CHROMA_MAX_BATCH):
+                end = start + CHROMA_MAX_BATCH
+                self.db._collection.add(
+                    ids=ids[start:end],
+                    embeddings=vectors[start:end],
+                    documents=texts[start:end],
+                    metadatas=metadatas[start:end]
+                )
+        elif self.store_type in FAISS_STORE_TYPES:
+            if self.db is None:
+                self.db = self._create_faiss_index()
+            self.db.add_embeddings(
+                text_embeddings=list(zip(texts, vectors)),
+                metadatas=metadatas,
+                ids=ids
+            )
+            if self.store_type == "faiss_ivfpq":
+                self._maybe_train_ivfpq()
+        elif self.store_type == "usearch":
+            if self.db is None:
+                self.db = USearchStore(
+                    self.embeddings,
+                    ndim=len(vectors[0]),
+                    connectivity=self.m,
+                    expansion_add=self.ef_construction,
+                    expansion_search=self.ef_search
+                )
+            self.db.add_embeddings(
+                text_embeddings=list(zip(texts, vectors)),
+                metadatas=metadatas,
+                ids=ids
+            )
+    
+    def _maybe_train_ivfpq(self):
+        """Replace the flat staging index with a trained IVF-PQ index once enough vectors exist"""
+        index = self.db.index
+        if not isinstance(index, faiss.IndexFlat) or index.ntotal < self.pq_train_size:
+            return
+        
+        # Fewer lists than the 1024 often quoted, so each centroid gets enough training points
+        nlist = max(1, self.pq_train_size // TRAIN_POINTS_PER_CENTROID)
+        vectors = index.reconstruct_n(0, index.ntotal)
+        ivfpq = faiss.index_factory(index.d, IVFPQ_FACTORY.format(nlist=nlist), faiss.METRIC_INNER_PRODUCT)
+        ivfpq.train(vectors[:self.pq_train_size])
+        # Same insertion order, so the docstore id mapping stays valid
+        ivfpq.add(vectors)
+        ivfpq.nprobe = self.nprobe
+        self.db.index = ivfpq
+    
+    def _stored_vectors(self) -> Tuple[List[str], List[str], List[Dict[str, Any]], np.ndarray]:
+        """Read back every stored (id, text, metadata, vector)"""
+        if self.store_type == "chroma":
+            stored = self.db._collection.get(include=["embeddings", "documents", "metadatas"])
+            return stored["ids"], stored["documents"], stored["metadatas"], np.asarray(stored["embeddings"])
+        
+        ids = [self.db.index_to_docstore_id[i] for i in range(len(self.db.index_to_docstore_id))]
+        if self.store_type == "usearch":
+            docs = [self.db.docstore[doc_id] for doc_id in ids]
+            vectors = self.db.index.get(np.arange(len(ids), dtype=np.uint64))
+        else:
+            docs = [self.db.docstore.search(doc_id) for doc_id in ids]
+            vectors = self.db.index.reconstruct_n(0, len(ids))
+        return ids, [doc.page_content for doc in docs], [doc.metadata for doc in docs], np.asarray(vectors)
+    
+    def _count(self) -> int:
+        if self.db is None:
+            return 0
+        if self.store_type == "chroma":
+            return self.db._collection.count()
+        return len(self.db.index_to_docstore_id)
+    
+    def _maybe_fit_projection(self):
+        """Fit PCA once enough chunks are stored, then rebuild the store on projected vectors"""
+        if self.dim_reduce is None or self.projection is not None or self._count() < PCA_MIN_CHUNKS:
+            return
+        
+        ids, texts, metadatas, vectors = self._stored_vectors()
+        pca = IncrementalPCA(n_components=self.dim_reduce)
+        pca.fit(vectors)
+        projection = np.vstack([pca.mean_, pca.components_]).astype(np.float32)
+        
+        # Build the projected store next to the full-width one, which stays intact until it is saved
+        old_db, old_index_path = self.db, self._index_path()
+        self._set_projection(projection)
         try:
+            self.db = None
             if self.store_type == "chroma":
-                if self.db is None:
-                    self.db = Chroma.from_documents(
-                        documents=documents,
-                        embedding=self.embeddings,
-                        persist_directory=self.persist_directory
-                    )
-                else:
-                    self.db.add_documents(documents)
-                self.db.persist()
-            elif self.store_type == "faiss":
-                if self.db is None:
-                    self.db = FAISS.from_documents(
-                        documents=documents,
-                        embedding=self.embeddings
-                    )
-                else:
-                    self.db.add_documents(documents)
-                
-                # Save FAISS index
-                os.makedirs(self.persist_directory, exist_ok=True)
-                index_path = os.path.join(self.persist_directory, "faiss_index")
-                self.db.save_local(index_path)
+                # A collection left by an interrupted rebuild may be partial
+                try:
+                    old_db._client.delete_collection(self._collection_name())
+                except Exception:
+                    pass
+                self._initialize_db()
             
+            projected = self.embeddings.project(vectors).tolist()
+            self._insert(ids, texts, metadatas, projected)
+            self._persist()
+            
+            # The saved projection switches reopened stores to the new data, so it is written atomically
+            tmp_path = self._pca_path() + ".tmp"
+            with open(tmp_path, 'wb') as file:
+                np.save(file, projection)
+            os.replace(tmp_path, self._pca_path())
+        except Exception:
+            self._set_projection(None)
+            self.db = old_db
+            raise
+        
+        # Only now drop the full-width data
+        if self.store_type == "chroma":
+            old_db.delete_collection()
+        elif old_index_path is not None:
+            shutil.rmtree(old_index_path, ignore_errors=True)
+    
+    def _persist(self):
+        """Flush the store and embedding cache to disk"""
+        if self.store_type == "chroma" and self.db is not None:
+            self.db.persist()
+        elif self.store_type in FAISS_STORE_TYPES and self.db is not None:
+            # Save FAISS index
+            os.makedirs(self.persist_directory, exist_ok=True)
+            self.db.save_local(self._index_path())
+        elif self.store_type == "usearch" and self.db is not None:
+            self.db.save_local(self._index_path())
+        
+        # Keep embeddings for warm starts
+        self.embedding_cache.save()
+    
+    def add_documents(self, documents: List[Document]) -> bool:
+        """Add documents to the vector store"""
+        try:
+            self._add_batch(documents)
+            self._maybe_fit_projection()
+            self._persist()
             return True
         except Exception as e:
             print(f"Error adding documents: {str(e)}")
             return False
     
-    def similarity_search(self, query: str, k: int = 5) -> List[Document]:
-        """Search for similar documents"""
-        if self.db is None:
-            return []
-        
+    def add_documents_stream(self, documents: Iterable[Document],
+                             batch_size: int = EMBEDDING_BATCH_SIZE) -> Optional[int]:
+        """Add documents from an iterator in embedding-sized batches, returning how many were new"""
+        count = 0
         try:
-            return self.db.similarity_search(query, k=k)
+            iterator = iter(documents)
+            while True:
+                batch = list(itertools.islice(iterator, batch_size))
+                if not batch:
+                    break
+                count += self._add_batch(batch)
+            
+            self._maybe_fit_projection()
+            self._persist()
+            return count
         except Exception as e:
-            print(f"Error during similarity search: {str(e)}")
-            return []
+            print(f"Error adding documents: {str(e)}")
+            return None
+    
+    def _faiss_hnsw_search(self, query: str, k: int, ef_search: int) -> List[Tuple[Document, float]]:
+        """Search a FAISS HNSW index with a per-call efSearch, leaving the shared index untouched"""
+        vector = np.asarray([self.embeddings.embed_query(query)], dtype=np.float32)
+        scores, indices = self.db.index.search(vector, k, params=faiss.SearchParametersHNSW(efSearch=ef_search))
+        
+        return [
+            (self.db.docstore.search(self.db.index_to_docstore_id[int(i)]), float(score))
+            for score, i in zip(scores[0], indices[0])
+            if i != -1
+        ]
+    
+    def _store_wide_search(self, query: str, k: int, ef_search: int) -> List[Tuple[Document, float]]:
+        """Search Chroma or USearch with the store-wide breadth set to ef_search for this call"""
+        with self._search_lock:
+            if ef_search != self._active_ef_search:
+                if self.store_type == "chroma":
+                    # Persisted by Chroma, so only written when the value actually changes
+                    self.db._collection.modify(configuration={"hnsw": {"ef_search": ef_search}})
+                else:
+                    self.db.index.expansion_search = ef_search
+                self._active_ef_search = ef_search
+            return self.db.similarity_search_with_score(query, k=k)
+    
+    def similarity_search(self, query: str, k: int = 5, ef_search: Optional[int] = None) -> List[Document]:
+        """Search for similar documents"""
+        return [doc for doc, _ in self.similarity_search_with_score(query, k=k, ef_search=ef_search)]
     
-    def similarity_search_with_score(self, query: str, k: int = 5) -> List[Tuple[Document, float]]:
-        """Search for similar documents with relevance scores"""
+    def similarity_search_with_score(self, query: str, k: int = 5,
+                                     ef_search: Optional[int] = None) -> List[Tuple[Document, float]]:
+        """Search for similar documents with relevance scores (ef_search=None uses the store's default)"""
+        if ef_search is not None and not self.supports_query_ef_search:
+            raise ValueError(f"ef_search cannot be set per query for store_type='{self.store_type}'")
+        
         if self.db is None:
             return []
         
         try:
+            if self.store_type in FAISS_STORE_TYPES:
+                if ef_search is not None:
+                    return self._faiss_hnsw_search(query, k, ef_search)
+                return self.db.similarity_search_with_score(query, k=k)
+            elif self.supports_query_ef_search:
+                # Every search holds the lock, so another query's breadth never leaks into this one
+                return self._store_wide_search(query, k, ef_search or self.ef_search)
             return self.db.similarity_search_with_score(query, k=k)
         except Exception as e:
             print(f"Error during similarity search with score: {str(e)}")
@@ -100,10 +489,22 @@ class VectorStore:
     def delete_collection(self) -> bool:
         """Delete the entire collection"""
         try:
+            if self._db is not None:
+                if self.store_type == "chroma":
+                    self._db.delete_collection()
+                    # Drop the cached client so a fresh SQLite file is opened next time
+                    self._db._client.clear_system_cache()
+                
+                # Release the old handles (Windows can't remove files that are still open)
+                self._db = None
+                gc.collect()
+            
             if os.path.exists(self.persist_directory):
                 shutil.rmtree(self.persist_directory)
-            self.db = None
-            self._initialize_db()
+            
+            # Reopen lazily on next access, at full width until a new projection is fitted
+            self._set_projection(None)
+            self._db_loaded = False
             return True
         except Exception as e:
             print(f"Error deleting collection: {str(e)}")
@@ -111,6 +512,14 @@ class VectorStore:
     
     def get_collection_info(self) -> Dict[str, Any]:
         """Get information about the collection"""
+        # Don't open a database just to report that there isn't one
+        if not self._db_loaded and not os.path.exists(self.persist_directory):
+            return {
+                "store_type": self.store_type,
+                "persist_directory": self.persist_directory,
+                "exists": False
+            }
+        
         info = {
             "store_type": self.store_type,
             "persist_directory": self.persist_directory,
@@ -122,5 +531,39 @@ class VectorStore:
                 info["count"] = self.db._collection.count()
             except:
                 info["count"] = "Unknown"
+        elif self.store_type == "usearch" and self.db is not None:
+            info["count"] = len(self.db.index)
+            # SIMD target USearch dispatched to (e.g. "sapphire" for AVX-512)
+            info["hardware_acceleration"] = self.db.index.hardware_acceleration
         
-        return info
\ No newline at end of file
+        return info
+
+# For testing
+if __name__ == "__main__":
+    import tempfile
+    
+    # Round-trip each FAISS store type through save_local/load_local
+    test_docs = [
+        Document(page_content=f"Test chunk {i} about topic {i % 7}", metadata={"source": "test"})
+        for i in range(300)
+    ]
+    for store_type in FAISS_STORE_TYPES:
+        with tempfile.TemporaryDirectory() as directory:
+            # The smallest training set keeps the check fast, so FAISS warns the PQ codebooks are undertrained
+            store = VectorStore(store_type=store_type, persist_directory=directory, pq_train_size=PQ_MIN_TRAIN_SIZE)
+            assert store.add_documents(test_docs), f"{store_type}: ingest failed"
+            if store_type == "faiss_ivfpq":
+                assert faiss.try_extract_index_ivf(store.db.index) is not None, "IVF-PQ index was not trained"
+            expected = [doc.page_content for doc in store.similarity_search("topic 3", k=3)]
+            
+            reloaded = VectorStore(store_type=store_type, persist_directory=directory, nprobe=8)
+            assert reloaded.db is not None, f"{store_type}: store did not reload"
+            assert reloaded._count() == store._count(), f"{store_type}: chunk count changed"
+            found = [doc.page_content for doc in reloaded.similarity_search("topic 3", k=3)]
+            assert found == expected, f"{store_type}: results changed after reload"
+            
+            # Search-time parameters are re-applied on load
+            if store_type == "faiss_ivfpq":
+                assert faiss.try_extract_index_ivf(reloaded.db.index).nprobe == 8, "nprobe not re-applied"
+            
+            print(f"{store_type}: reloaded {reloaded._count()} chunks")